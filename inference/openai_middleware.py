@@ -5,12 +5,25 @@ Supports both streaming and non-streaming modes, with proper field separation fo
 tool_calls, content, and reasoning_content.
 """
 
+import asyncio
 import requests
+import httpx
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import collections
+import functools
+import hashlib
 import json
+import os
+import secrets
+import sqlite3
+import threading
 import time
 import re
 import base64
+import mmap
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any, Generator
 import datetime
 from jinja2 import Environment, FileSystemLoader
@@ -26,9 +39,295 @@ if not logger.handlers:
     logger.setLevel(logging.INFO)
 
 
+# pybase64 uses SIMD (SSSE3/AVX2) for base64 and is several times faster
+# than the stdlib on the multi-MB image payloads the multimodal path
+# handles; same API, so fall back transparently when it is not installed.
+try:
+    import pybase64 as _b64
+except ImportError:
+    _b64 = base64
+
+
+# Compiled once at module load; used on every response that may carry
+# <tool_call> blocks
+_TOOLCALL_RE = re.compile(r"<tool_call>\s*(\{.*?\})\s*</tool_call>", re.DOTALL)
+
+_TOOLCALL_OPEN = "<tool_call>"
+_TOOLCALL_CLOSE = "</tool_call>"
+_THINK_OPEN = "<think>\n"
+_THINK_CLOSE = "\n</think>"
+
+
+def _scan_toolcall_blocks(text: str) -> List[str]:
+    """
+    Collect the payloads of <tool_call>...</tool_call> blocks with a linear
+    index-based scan. The DOTALL regex equivalent backtracks across the whole
+    response when a block is missing or unterminated, which on multi-KB
+    generations makes the miss case the expensive one; two str.find calls per
+    block keep the scan O(N) regardless.
+    """
+    blocks = []
+    i = 0
+    while True:
+        start = text.find(_TOOLCALL_OPEN, i)
+        if start < 0:
+            break
+        end = text.find(_TOOLCALL_CLOSE, start + len(_TOOLCALL_OPEN))
+        if end < 0:
+            break
+        blocks.append(text[start + len(_TOOLCALL_OPEN):end].strip())
+        i = end + len(_TOOLCALL_CLOSE)
+    return blocks
+
+
+def _scan_think_block(text: str) -> Optional[str]:
+    """Extract the first <think>\\n...\\n</think> payload with the same
+    linear scan; returns None when no complete block is present."""
+    start = text.find(_THINK_OPEN)
+    if start < 0:
+        return None
+    end = text.find(_THINK_CLOSE, start + len(_THINK_OPEN))
+    if end < 0:
+        return None
+    return text[start + len(_THINK_OPEN):end]
+
+
+# orjson encodes/decodes several times faster than stdlib json and accepts
+# bytes directly; fall back to the stdlib when it is not installed.
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so existing
+# except-clauses keep working in both modes.
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps(obj) -> str:
+        # orjson is UTF-8 native, i.e. ensure_ascii=False is implicit
+        return orjson.dumps(obj).decode()
+
+    def _json_dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    orjson = None
+
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+    def _json_dumps_bytes(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode()
+
+
+# ijson parses JSON incrementally off a file-like object, so multi-MB
+# response bodies never need to sit in memory twice (raw bytes + parsed
+# tree); optional like the other accelerators.
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Bodies at least this large (per Content-Length) are parsed incrementally
+# with ijson when it is available; smaller ones go through the regular
+# whole-body decode, which is faster for the common case.
+_STREAM_PARSE_MIN_BYTES = 1 << 20
+
+
+def _canonical_dumps_bytes(obj) -> bytes:
+    """Serialize with sorted keys so equal requests hash identically."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True).encode()
+
+
+class CacheProvider:
+    """
+    Interface for pluggable response caches. Implementations store the raw
+    response body (bytes) keyed by a hash of the request payload.
+    """
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes):
+        raise NotImplementedError
+
+
+class Sqlite3CacheProvider(CacheProvider):
+    """On-disk response cache backed by sqlite3 in WAL mode."""
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response BLOB)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response) VALUES (?, ?)",
+                (key, value)
+            )
+            self._conn.commit()
+
+
+class InMemoryLRUCache(CacheProvider):
+    """
+    Process-local LRU cache. Caching is opt-in: nothing is cached unless a
+    provider is passed to the ctor or OPENAI_MIDDLEWARE_CACHE_PATH selects
+    the sqlite backend; this is the zero-setup choice when opting in.
+    """
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data = collections.OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class RedisCacheProvider(CacheProvider):
+    """Thin wrapper over a redis-py client for cross-process cache sharing."""
+    def __init__(self, client, prefix: str = "oaimw:", ttl: int = 3600):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes):
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+
+class MemcachedCacheProvider(CacheProvider):
+    """Thin wrapper over a pymemcache/python-memcached style client."""
+    def __init__(self, client, prefix: str = "oaimw:", ttl: int = 3600):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes):
+        self.client.set(self.prefix + key, value, expire=self.ttl)
+
+
+@functools.lru_cache(maxsize=16)
+def _base_payload_template(model, temperature, top_p, max_tokens,
+                           presence_penalty, stream) -> Dict[str, Any]:
+    """Scalar skeleton of a /chat/completions payload. Callers must .copy()
+    before mutating; the cached dict itself is shared."""
+    return {
+        "model": model,
+        "temperature": temperature,
+        "top_p": top_p,
+        "max_tokens": max_tokens,
+        "presence_penalty": presence_penalty,
+        "stream": stream
+    }
+
+
+@functools.lru_cache(maxsize=16)
+def _payload_prefix(model, temperature, top_p, max_tokens,
+                    presence_penalty, stream) -> bytes:
+    """
+    Pre-encoded static prefix of a /chat/completions body, up to and
+    including the '"messages":' key. Loops that call create() with a fixed
+    config re-encode these scalar fields thousands of times; splicing the
+    cached prefix leaves only the per-call fields to serialize.
+    """
+    scalars = _json_dumps_bytes(_base_payload_template(
+        model, temperature, top_p, max_tokens, presence_penalty, stream))
+    return scalars[:-1] + b',"messages":'
+
+
+# [local-day ordinal, formatted date] pair backing today_date()
+_DATE_CACHE: List[Any] = [None, None]
+
+
+def _response_cache_key(model, messages, tools, temperature, top_p, max_tokens, stop) -> str:
+    """Hash the request fields that determine the completion."""
+    return hashlib.blake2b(_canonical_dumps_bytes({
+        "model": model,
+        "messages": messages,
+        "tools": tools,
+        "temperature": temperature,
+        "top_p": top_p,
+        "max_tokens": max_tokens,
+        "stop": stop
+    })).hexdigest()
+
+
+def _iter_lines_fast(response: requests.Response,
+                     chunk_size: int = 65536) -> Generator[bytes, None, None]:
+    """
+    Yield complete lines (without the trailing newline) from a streaming
+    response. Unlike requests' iter_lines, which rescans its buffer per
+    chunk and goes quadratic when a single SSE data: line spans many
+    chunks (large tool-call argument deltas), this buffers raw chunks in a
+    bytearray and carves lines off the front with bytes.find.
+    """
+    buf = bytearray()
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if not chunk:
+            continue
+        buf += chunk
+        while True:
+            nl = buf.find(b'\n')
+            if nl < 0:
+                break
+            yield bytes(buf[:nl])
+            del buf[:nl + 1]
+    if buf:
+        yield bytes(buf)
+
+
+def _iter_sse_data(response: requests.Response,
+                   chunk_size: int = 65536) -> Generator[bytes, None, None]:
+    """
+    Yield the payload bytes of SSE 'data:' lines from a streaming response,
+    skipping blank and non-data lines (event:, comments). The framing work
+    all happens in C — bytes.find is memchr underneath — and partition
+    locates and strips the prefix in a single pass instead of the
+    startswith-then-slice pair.
+    """
+    for line in _iter_lines_fast(response, chunk_size):
+        before, sep, payload = line.strip().partition(b'data: ')
+        if sep and not before:
+            yield payload
+
+
 class ChatCompletionMessage:
     """Mimics OpenAI's ChatCompletionMessage structure"""
-    def __init__(self, content: str, 
+    # High-QPS loops build one of these per response; slots drop the
+    # per-instance __dict__ and speed up attribute access
+    __slots__ = ("content", "reasoning_content", "role", "tool_calls")
+
+    def __init__(self, content: str,
                  reasoning_content: Optional[str] = None,
                  role: str = "assistant", 
                  tool_calls: Optional[List[Dict]] = None):
@@ -40,6 +339,8 @@ class ChatCompletionMessage:
 
 class ChatCompletionChoice:
     """Mimics OpenAI's ChatCompletionChoice structure"""
+    __slots__ = ("message", "index", "finish_reason")
+
     def __init__(self, message: ChatCompletionMessage, index: int = 0):
         self.message = message
         self.index = index
@@ -48,19 +349,62 @@ class ChatCompletionChoice:
 
 class ChatCompletion:
     """Mimics OpenAI's ChatCompletion structure"""
+    __slots__ = ("choices", "id", "object", "created", "model")
+
     def __init__(self, choices: List[ChatCompletionChoice]):
         self.choices = choices
-        self.id = f"chatcmpl-{int(time.time())}"
+        # Single clock read: keeps id and created consistent across second
+        # boundaries and halves the syscalls per response object. The random
+        # suffix keeps ids unique when concurrent completions land within the
+        # same second (create_many makes that the common case).
+        now = int(time.time())
+        self.id = f"chatcmpl-{now}-{secrets.token_hex(4)}"
         self.object = "chat.completion"
-        self.created = int(time.time())
+        self.created = now
         self.model = "unknown"
 
 class ToolCallFunction:
-    def __init__(self, name: str, arguments: str):
+    # Responses can carry dozens of tool calls; slots keep these tiny
+    # value objects dict-free like the completion classes above
+    __slots__ = ("name", "_args_str", "_args_obj")
+
+    def __init__(self, name: str, arguments=None):
         self.name = name
-        self.arguments = arguments
-                
+        # Accept either the OpenAI-style JSON string or the already-parsed
+        # object; each representation is derived from the other at most
+        # once, on first access, so no caller pays a decode+encode
+        # round-trip it does not use
+        if isinstance(arguments, str):
+            self._args_str = arguments
+            self._args_obj = None
+        else:
+            self._args_str = None
+            self._args_obj = arguments
+
+    @property
+    def arguments(self) -> str:
+        """Arguments as a JSON string (OpenAI wire format)."""
+        if self._args_str is None:
+            self._args_str = _json_dumps(
+                self._args_obj if self._args_obj is not None else {})
+        return self._args_str
+
+    @property
+    def arguments_obj(self):
+        """Arguments as a parsed object; unparseable strings yield {}."""
+        if self._args_obj is None:
+            if self._args_str:
+                try:
+                    self._args_obj = _json_loads(self._args_str)
+                except json.JSONDecodeError:
+                    self._args_obj = {}
+            else:
+                self._args_obj = {}
+        return self._args_obj
+
 class ToolCall:
+    __slots__ = ("id", "type", "function")
+
     def __init__(self, id: str, type: str, function: ToolCallFunction):
         self.id = id
         self.type = type
@@ -68,16 +412,252 @@ class ToolCall:
 
 
 
+def _build_session(api_key: str) -> requests.Session:
+    """
+    Build a pooled requests.Session with auth headers and retry policy.
+    One session is shared by all sub-objects of a client so every request
+    reuses the same keep-alive connection pool.
+    """
+    session = requests.Session()
+    session.headers.update({
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    })
+    # pool_block avoids urllib3 silently discarding (and re-handshaking)
+    # connections when bursty fan-out exceeds the pool; read=0 keeps us from
+    # replaying a non-idempotent completion whose response was cut mid-body
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=128,
+        pool_block=True,
+        max_retries=Retry(
+            total=3,
+            connect=3,
+            read=0,
+            backoff_factor=0.25,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset(["POST", "GET", "HEAD"])
+        )
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Process-wide sessions handed to clients constructed without one, keyed by
+# api key (the auth header lives on the session). Sharing the pool across
+# client objects lets repeated calls to the same host reuse keep-alive
+# connections and resumed TLS sessions instead of re-handshaking per client.
+_SHARED_SESSIONS: Dict[str, requests.Session] = {}
+_SHARED_SESSIONS_LOCK = threading.Lock()
+
+
+def _shared_session(api_key: str) -> requests.Session:
+    """Return (building on first use) the process-wide session for a key."""
+    with _SHARED_SESSIONS_LOCK:
+        session = _SHARED_SESSIONS.get(api_key)
+        if session is None:
+            session = _SHARED_SESSIONS[api_key] = _build_session(api_key)
+        return session
+
+
+def _prewarm_session(session: requests.Session, base_url: str):
+    """
+    Pre-warm the connection pool in the background so the first real
+    request finds a keep-alive connection with DNS+TCP+TLS already done.
+    Errors (including 404/405 from servers that reject HEAD) are ignored.
+    Idempotent per (session, base_url): short-lived clients drawing from
+    the shared pool must not spawn a probe thread per construction.
+    """
+    warmed = getattr(session, "_prewarmed_urls", None)
+    if warmed is None:
+        warmed = session._prewarmed_urls = set()
+    if base_url in warmed:
+        return
+    warmed.add(base_url)
+
+    def _warm():
+        try:
+            session.head(base_url, timeout=5)
+        except Exception:
+            pass
+
+    threading.Thread(target=_warm, daemon=True).start()
+
+
+# Results of the LightLLM /chat/completions endpoint probe, keyed by probe
+# URL. Process-wide like _SHARED_SESSIONS: callers routinely build a fresh
+# client per request, and without this each one would pay a blocking HEAD
+# round-trip before its first real call.
+_ENDPOINT_PROBES: Dict[str, bool] = {}
+_ENDPOINT_PROBES_LOCK = threading.Lock()
+
+
 class ChatCompletions:
     """Mimics OpenAI's chat.completions API with streaming support"""
-    def __init__(self, api_key: str, base_url: str, timeout: float = 600.0):
+    __slots__ = ("api_key", "base_url", "timeout", "wire_format", "_msgpack",
+                 "_wire_headers", "_session", "cache", "_tools_bytes_cache",
+                 "_aclient")
+
+    def __init__(self, api_key: str, base_url: str, timeout: float = 600.0,
+                 session: Optional[requests.Session] = None,
+                 cache: Optional[CacheProvider] = None,
+                 wire_format: str = "json"):
         self.api_key = api_key
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
-        logger.info(f"ChatCompletions initialized with base_url: {self.base_url}")
-    
+        # Optional binary wire format for private backends that accept it;
+        # msgpack encodes/decodes several times faster than JSON and shrinks
+        # large prompt bodies. Import lazily so json-mode callers never pay
+        # for the dependency.
+        if wire_format not in ("json", "msgpack"):
+            raise ValueError(f"Unsupported wire_format: {wire_format}")
+        self.wire_format = wire_format
+        if wire_format == "msgpack":
+            import msgpack
+            self._msgpack = msgpack
+            self._wire_headers = {
+                "Content-Type": "application/msgpack",
+                "Accept": "application/msgpack"
+            }
+        else:
+            self._msgpack = None
+            self._wire_headers = None
+        # Reuse one pooled session for every create() call so TCP+TLS
+        # handshakes are paid once per connection instead of once per request.
+        # A session passed in by the owning client is shared, not owned;
+        # standalone instances draw from the process-wide pool so multiple
+        # client objects against the same host share connections too.
+        self._session = _shared_session(api_key) if session is None else session
+        # Opt-in response cache for replays/eval sweeps re-issuing identical
+        # deterministic prompts: any CacheProvider via the ctor, or the
+        # on-disk sqlite3 backend via the env var
+        if cache is None:
+            cache_path = os.getenv('OPENAI_MIDDLEWARE_CACHE_PATH')
+            cache = Sqlite3CacheProvider(cache_path) if cache_path else None
+        self.cache: Optional[CacheProvider] = cache
+        # Serialized tools schemas keyed by list identity: agent loops pass
+        # the same tools object on every turn, and the schema is often the
+        # largest part of the body. The stored reference keeps the id from
+        # being recycled; a list mutated in place between calls would go
+        # stale, so callers must rebuild the list to change tools (as the
+        # OpenAI client also expects).
+        self._tools_bytes_cache = collections.OrderedDict()
+        # Async client for acreate(); built lazily on first use
+        self._aclient: Optional["httpx.AsyncClient"] = None
+        logger.info("ChatCompletions initialized with base_url: %s", self.base_url)
+
+    def close(self):
+        """
+        No-op kept for API compatibility: the underlying session is shared
+        (process-wide or owned by the enclosing client) and outlives this
+        instance.
+        """
+
+    def _chat_completions_url(self) -> str:
+        return f"{self.base_url}/chat/completions"
+
+    def _post(self, url: str, payload: Dict[str, Any], stream: bool = False,
+              error_prefix: str = "", body: Optional[bytes] = None) -> requests.Response:
+        """
+        POST a payload over the pooled session with unified error logging.
+        Single choke point for both completion classes - one place to add
+        metrics or tweak resilience (retries/backoff live on the adapter).
+        Callers that already hold an encoded body pass it via `body`.
+        """
+        try:
+            response = self._session.post(
+                url,
+                data=body if body is not None else self._encode_body(payload),
+                headers=self._wire_headers,
+                timeout=self.timeout,
+                stream=stream
+            )
+            response.raise_for_status()
+            return response
+        except requests.exceptions.Timeout as e:
+            logger.error("%sRequest timeout after %ss: %s", error_prefix, self.timeout, e)
+            raise
+        except requests.exceptions.ConnectionError as e:
+            logger.error("%sConnection error to %s: %s", error_prefix, url, e)
+            raise
+        except requests.exceptions.HTTPError as e:
+            logger.error("%sHTTP error %s: %s", error_prefix, response.status_code, e)
+            # Try to log response body for debugging
+            try:
+                # Decode only the slice actually logged; response.text would
+                # utf-8 decode the whole body just to throw most of it away
+                error_body = response.content[:500].decode('utf-8', errors='replace')
+                logger.error("Error response body: %s", error_body)
+            except:
+                pass
+            raise
+        except requests.exceptions.RequestException as e:
+            logger.error("%sRequest failed: %s", error_prefix, e)
+            raise
+
+    def _encode_body(self, payload: Dict[str, Any]) -> bytes:
+        """Serialize a request payload in the configured wire format."""
+        if self._msgpack is not None:
+            return self._msgpack.packb(payload, use_bin_type=True)
+        return _json_dumps_bytes(payload)
+
+    def _encode_chat_body(self, payload: Dict[str, Any]) -> bytes:
+        """
+        Encode a /chat/completions payload built by _build_payload. In json
+        mode the static scalar fields come from the cached _payload_prefix
+        and only the dynamic fields are serialized per call; msgpack mode
+        encodes the whole dict (the format has no splice-friendly prefix).
+        """
+        if self._msgpack is not None:
+            return self._msgpack.packb(payload, use_bin_type=True)
+        parts = [
+            _payload_prefix(payload["model"], payload["temperature"],
+                            payload["top_p"], payload["max_tokens"],
+                            payload["presence_penalty"], payload["stream"]),
+            _json_dumps_bytes(payload["messages"])
+        ]
+        for field in ("stop", "logprobs"):
+            value = payload.get(field)
+            if value is not None:
+                parts.append(b',"' + field.encode('ascii') + b'":')
+                parts.append(_json_dumps_bytes(value))
+        tools = payload.get("tools")
+        if tools is not None:
+            parts.append(b',"tools":')
+            parts.append(self._tools_bytes(tools))
+        parts.append(b'}')
+        return b''.join(parts)
+
+    def _tools_bytes(self, tools) -> bytes:
+        """Serialized tools schema, memoized per tools-list identity."""
+        entry = self._tools_bytes_cache.get(id(tools))
+        if entry is not None and entry[0] is tools:
+            self._tools_bytes_cache.move_to_end(id(tools))
+            return entry[1]
+        blob = _json_dumps_bytes(tools)
+        self._tools_bytes_cache[id(tools)] = (tools, blob)
+        if len(self._tools_bytes_cache) > _TOOL_PROMPT_CACHE_SIZE:
+            self._tools_bytes_cache.popitem(last=False)
+        return blob
+
+    def _decode_body(self, body: bytes):
+        """Deserialize a response body in the configured wire format."""
+        if self._msgpack is not None:
+            return self._msgpack.unpackb(body, raw=False)
+        return _json_loads(body)
+
     def today_date(self):
-        return datetime.date.today().strftime("%Y-%m-%d")
+        # Formatted once per day instead of per create(). The cache is keyed
+        # on the local-day ordinal — a UTC epoch-day key would serve a stale
+        # date for up to the UTC-offset hours after each local midnight —
+        # leaving only the cheap date.today() guard on the hot path
+        today = datetime.date.today()
+        ordinal = today.toordinal()
+        if _DATE_CACHE[0] != ordinal:
+            _DATE_CACHE[0] = ordinal
+            _DATE_CACHE[1] = today.strftime("%Y-%m-%d")
+        return _DATE_CACHE[1]
     
     def _parse_tool_calls_from_response(self, tool_calls_data: List[Dict]) -> Optional[List]:
         """
@@ -88,23 +668,26 @@ class ChatCompletions:
             return None
         
         if not isinstance(tool_calls_data, list):
-            logger.warning(f"tool_calls_data is not a list: {type(tool_calls_data)}")
+            logger.warning("tool_calls_data is not a list: %s", type(tool_calls_data))
             return None
         
         tool_calls = []
+        # One clock read per response, not one per tool call
+        ts = int(time.time())
+        debug = logger.isEnabledFor(logging.DEBUG)
         for idx, tc in enumerate(tool_calls_data):
             if not isinstance(tc, dict):
-                logger.warning(f"Tool call at index {idx} is not a dict: {type(tc)}")
+                logger.warning("Tool call at index %s is not a dict: %s", idx, type(tc))
                 continue
             try:
                 # Handle different API formats
                 function_data = tc.get("function", {})
                 if not isinstance(function_data, dict):
-                    logger.warning(f"Function data is not a dict at index {idx}")
+                    logger.warning("Function data is not a dict at index %s", idx)
                     continue
-                
+
                 tool_call = ToolCall(
-                    id=tc.get("id", f"call_{idx}_{int(time.time())}"),
+                    id=tc.get("id", f"call_{idx}_{ts}"),
                     type=tc.get("type", "function"),
                     function=ToolCallFunction(
                         name=function_data.get("name", ""),
@@ -112,9 +695,10 @@ class ChatCompletions:
                     )
                 )
                 tool_calls.append(tool_call)
-                logger.debug(f"Parsed tool call {idx}: {function_data.get('name', 'unknown')}")
+                if debug:
+                    logger.debug("Parsed tool call %s: %s", idx, function_data.get('name', 'unknown'))
             except Exception as e:
-                logger.warning(f"Failed to parse tool call at index {idx}: {tc}, error: {e}")
+                logger.warning("Failed to parse tool call at index %s: %s, error: %s", idx, tc, e)
         
         return tool_calls if tool_calls else None
     
@@ -123,36 +707,38 @@ class ChatCompletions:
         Extract tool calls from content if they exist as <tool_call> tags.
         Returns tuple of (cleaned_content, tool_calls_list).
         """
-        import re
-        
-        # Pattern to find tool calls in content
-        toolcall_pattern = re.compile(r"<tool_call>\s*(\{.*?\})\s*</tool_call>", re.DOTALL)
-        toolcalls_matches = toolcall_pattern.findall(content)
-        
-        if not toolcalls_matches:
-            return content, None
-        
-        # Parse tool calls
+        # One finditer pass both collects the tool-call payloads and builds
+        # the cleaned content from the interleaved non-match segments;
+        # findall followed by sub would scan the full content twice
         tool_calls_list = []
-        for i, toolcall_str in enumerate(toolcalls_matches):
+        pieces = []
+        last = 0
+        ts = int(time.time())
+        for i, match in enumerate(_TOOLCALL_RE.finditer(content)):
+            pieces.append(content[last:match.start()])
+            last = match.end()
+            toolcall_str = match.group(1)
             try:
-                toolcall_json = json.loads(toolcall_str)
+                toolcall_json = _json_loads(toolcall_str)
                 function = ToolCallFunction(
                     name=toolcall_json.get("name", ""),
-                    arguments=json.dumps(toolcall_json.get("arguments", {}))
+                    arguments=toolcall_json.get("arguments", {})
                 )
                 tool_call = ToolCall(
-                    id=f"call_{i}_{int(time.time())}",
+                    id=f"call_{i}_{ts}",
                     type="function",
                     function=function
                 )
                 tool_calls_list.append(tool_call)
             except json.JSONDecodeError as e:
-                logger.warning(f"Failed to parse tool call from content: {toolcall_str}, error: {e}")
-        
-        # Remove tool call tags from content
-        cleaned_content = toolcall_pattern.sub('', content).strip()
-        
+                logger.warning("Failed to parse tool call from content: %s, error: %s", toolcall_str, e)
+
+        if last == 0:
+            return content, None
+
+        pieces.append(content[last:])
+        cleaned_content = ''.join(pieces).strip()
+
         return cleaned_content, (tool_calls_list if tool_calls_list else None)
     
     def _create_completion_from_data(self, model: str, content: str, 
@@ -167,18 +753,20 @@ class ChatCompletions:
         - If tool_calls field is provided, remove <tool_call> tags from content
         - If content has <tool_call> tags but no tool_calls field, parse them
         """
-        # Check if content has tool call tags
-        if '<tool_call>' in content:
+        # Check if content has tool call tags. API-native tool-call
+        # responses usually carry empty (or null) content alongside the
+        # structured tool_calls array; the truthiness check short-circuits
+        # the full-string scan for those and tolerates content=None
+        if content and '<tool_call>' in content:
             if tool_calls:
                 # Tool calls field exists, remove tags from content
-                import re
-                cleaned_content = re.sub(r"<tool_call>\s*\{.*?\}\s*</tool_call>", '', content, flags=re.DOTALL).strip()
-                logger.debug(f"Removed tool_call tags from content (tool_calls field present)")
+                cleaned_content = _TOOLCALL_RE.sub('', content).strip()
+                logger.debug("Removed tool_call tags from content (tool_calls field present)")
                 content = cleaned_content
             else:
                 # No tool_calls field, parse from content
                 content, tool_calls = self._extract_tool_calls_from_content(content)
-                logger.debug(f"Extracted {len(tool_calls) if tool_calls else 0} tool_calls from content")
+                logger.debug("Extracted %s tool_calls from content", len(tool_calls) if tool_calls else 0)
         
         message = ChatCompletionMessage(
             reasoning_content=reasoning_content,
@@ -199,102 +787,117 @@ class ChatCompletions:
         Handles OpenAI's Server-Sent Events (SSE) format.
         """
         logger.info("Processing streaming response")
-        aggregated_content = ""
-        aggregated_reasoning = None
+        # Accumulate into lists and join once at the end: += on growing
+        # strings re-copies the whole buffer per chunk (O(N^2) over a long
+        # generation), and the tool-call buffers stored in dicts defeat
+        # CPython's in-place concat optimization entirely
+        content_parts = []
+        reasoning_parts = None
         aggregated_tool_calls = []
-        tool_call_buffer = {}  # Buffer to accumulate tool call deltas
+        # Tool-call deltas are addressed by small contiguous indices, so a
+        # list grown on demand replaces per-delta dict hashing with plain
+        # array indexing and comes out already ordered
+        tool_call_buffer = []
         chunk_count = 0
+        # f-strings in the per-chunk debug calls allocate even when debug
+        # logging is off (the default); evaluate the level check once
+        debug = logger.isEnabledFor(logging.DEBUG)
         
         try:
-            for line in response.iter_lines():
-                if not line:
-                    continue
-                
-                try:
-                    line = line.decode('utf-8').strip()
-                    
-                except UnicodeDecodeError as e:
-                    logger.warning(f"Failed to decode line: {e}")
-                    continue
-                
-                if not line.startswith('data: '):
-                    # Skip non-data lines (e.g., event: message)
-                    continue
-                
-                data_str = line[6:]  # Remove 'data: ' prefix
-                if data_str == '[DONE]':
-                    logger.debug("Received [DONE] signal")
+            # Work on raw bytes: no per-line utf-8 decode, and orjson ingests
+            # the sliced bytes directly
+            for data_str in _iter_sse_data(response):
+                if data_str == b'[DONE]':
+                    if debug:
+                        logger.debug("Received [DONE] signal")
                     break
                 
                 chunk_count += 1
                 try:
-                    chunk = json.loads(data_str)
-                    choices = chunk.get('choices', [])
-                    if not choices:
-                        logger.debug(f"Chunk {chunk_count}: No choices in chunk")
+                    chunk = _json_loads(data_str)
+                    # delta is the only field consumed out of each chunk;
+                    # index straight into it and let the (rare) miss fall
+                    # through to the except instead of paying three .get()
+                    # lookups per chunk on the happy path
+                    try:
+                        delta = chunk['choices'][0]['delta']
+                    except (KeyError, IndexError):
+                        if debug:
+                            logger.debug("Chunk %s: No choices/delta in chunk", chunk_count)
                         continue
-                    
-                    delta = choices[0].get('delta', {})
                     if not delta:
-                        logger.debug(f"Chunk {chunk_count}: Empty delta")
+                        if debug:
+                            logger.debug("Chunk %s: Empty delta", chunk_count)
                         continue
-                    
+
                     # Aggregate content
                     if 'content' in delta and delta['content']:
-                        aggregated_content += delta['content']
-                    
+                        content_parts.append(delta['content'])
+
                     # Aggregate reasoning_content
                     if 'reasoning_content' in delta and delta['reasoning_content']:
-                        if aggregated_reasoning is None:
-                            aggregated_reasoning = ""
-                        aggregated_reasoning += delta['reasoning_content']
-                    
+                        if reasoning_parts is None:
+                            reasoning_parts = []
+                        reasoning_parts.append(delta['reasoning_content'])
+
                     # Aggregate tool_calls
                     if 'tool_calls' in delta:
                         for tool_call_delta in delta['tool_calls']:
                             index = tool_call_delta.get('index', 0)
-                            
-                            if index not in tool_call_buffer:
-                                tool_call_buffer[index] = {
+                            while len(tool_call_buffer) <= index:
+                                tool_call_buffer.append(None)
+                            buffered = tool_call_buffer[index]
+                            if buffered is None:
+                                # id and type only arrive on the first delta
+                                # for an index; initialize from it once and
+                                # skip those key checks on every later delta
+                                buffered = tool_call_buffer[index] = {
                                     'id': tool_call_delta.get('id', ''),
                                     'type': tool_call_delta.get('type', 'function'),
-                                    'function': {
-                                        'name': '',
-                                        'arguments': ''
-                                    }
+                                    'name_parts': [],
+                                    'arguments_parts': []
                                 }
-                            
-                            if 'id' in tool_call_delta:
-                                tool_call_buffer[index]['id'] = tool_call_delta['id']
-                            if 'type' in tool_call_delta:
-                                tool_call_buffer[index]['type'] = tool_call_delta['type']
-                            
+
                             if 'function' in tool_call_delta:
                                 func_delta = tool_call_delta['function']
                                 if 'name' in func_delta:
-                                    tool_call_buffer[index]['function']['name'] += func_delta['name']
+                                    buffered['name_parts'].append(func_delta['name'])
                                 if 'arguments' in func_delta:
-                                    tool_call_buffer[index]['function']['arguments'] += func_delta['arguments']
+                                    buffered['arguments_parts'].append(func_delta['arguments'])
                 
                 except json.JSONDecodeError as e:
-                    logger.warning(f"Failed to parse streaming chunk: {data_str}, error: {e}")
+                    logger.warning("Failed to parse streaming chunk: %s, error: %s", data_str, e)
                     continue
         
         except Exception as e:
-            logger.error(f"Error processing stream: {e}")
+            logger.error("Error processing stream: %s", e)
             raise
         
-        # Convert tool_call_buffer to list
+        # Join the buffers once and convert tool_call_buffer to list
+        aggregated_content = ''.join(content_parts)
+        aggregated_reasoning = ''.join(reasoning_parts) if reasoning_parts is not None else None
         if tool_call_buffer:
-            aggregated_tool_calls = [tool_call_buffer[i] for i in sorted(tool_call_buffer.keys())]
-        
-        logger.info(f"Stream aggregation complete - chunks: {chunk_count}, content_len: {len(aggregated_content)}, "
-                   f"tool_calls: {len(aggregated_tool_calls)}, has_reasoning: {aggregated_reasoning is not None}")
-        
+            aggregated_tool_calls = [
+                {
+                    'id': buffered['id'],
+                    'type': buffered['type'],
+                    'function': {
+                        'name': ''.join(buffered['name_parts']),
+                        'arguments': ''.join(buffered['arguments_parts'])
+                    }
+                }
+                for buffered in tool_call_buffer
+                if buffered is not None
+            ]
+
+        logger.info("Stream aggregation complete - chunks: %d, content_len: %d, "
+                   "tool_calls: %d, has_reasoning: %s", chunk_count, len(aggregated_content),
+                   len(aggregated_tool_calls), aggregated_reasoning is not None)
+
         # Validate we got some content
         if not aggregated_content and not aggregated_tool_calls:
             logger.warning("Stream aggregation resulted in empty content and no tool calls")
-        
+
         return {
             'content': aggregated_content,
             'reasoning_content': aggregated_reasoning,
@@ -341,74 +944,45 @@ class ChatCompletions:
             raise ValueError("Model parameter cannot be empty")
         
         if not messages or not isinstance(messages, list):
-            logger.error(f"Invalid messages parameter: {type(messages)}")
+            logger.error("Invalid messages parameter: %s", type(messages))
             raise ValueError("Messages must be a non-empty list")
-        
-        logger.info(f"Creating chat completion - model: {model}, stream: {stream}, "
-                   f"has_tools: {tools is not None}, messages_count: {len(messages)}")
+
+        logger.info("Creating chat completion - model: %s, stream: %s, "
+                   "has_tools: %s, messages_count: %d",
+                   model, stream, tools is not None, len(messages))
 
         # Construct the request payload in OpenAI format
-        payload = {
-            "model": model,
-            "messages": messages,
-            "temperature": temperature,
-            "top_p": top_p,
-            "max_tokens": max_tokens,
-            "presence_penalty": presence_penalty,
-            "stream": stream
-        }
-        
-        if stop:
-            payload["stop"] = stop
-            logger.debug(f"Added stop sequences: {stop}")
-        
-        if logprobs:
-            payload["logprobs"] = logprobs
-        
-        if tools:
-            payload["tools"] = tools
-            logger.debug(f"Added {len(tools)} tools to request")
+        payload = self._build_payload(model, messages, temperature, top_p,
+                                      max_tokens, stop, presence_penalty,
+                                      logprobs, tools, stream)
         print("="*10)
         print("input payload:", payload)
         print("="*10)
-        # Prepare headers
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
-        # Make the request using requests library
-        url = f"{self.base_url}/chat/completions"
-        logger.debug(f"Sending request to: {url}")
-        
-        try:
-            response = requests.post(
-                url,
-                headers=headers,
-                json=payload,
-                timeout=self.timeout,
-                stream=stream
-            )
-            response.raise_for_status()
-        except requests.exceptions.Timeout as e:
-            logger.error(f"Request timeout after {self.timeout}s: {e}")
-            raise
-        except requests.exceptions.ConnectionError as e:
-            logger.error(f"Connection error to {url}: {e}")
-            raise
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP error {response.status_code}: {e}")
-            # Try to log response body for debugging
+        # Serve deterministic repeats from the opt-in response cache
+        cache_key = None
+        if self.cache is not None and not stream and temperature == 0:
+            cache_key = _response_cache_key(model, messages, tools, temperature,
+                                            top_p, max_tokens, stop)
             try:
-                error_body = response.text[:500]  # First 500 chars
-                logger.error(f"Error response body: {error_body}")
-            except:
-                pass
-            raise
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request failed: {e}")
-            raise
-        
+                cached = self.cache.get(cache_key)
+            except Exception as e:
+                logger.warning("Response cache lookup failed: %s", e)
+                cached = None
+            if cached is not None:
+                logger.info("Response cache hit - skipping LLM round-trip")
+                return self._parse_chat_response(self._decode_body(cached), model)
+
+        # Make the request over the pooled session (auth headers are set once
+        # on the session in __init__)
+        url = self._chat_completions_url()
+        logger.debug("Sending request to: %s", url)
+
+        # stream=True defers the body download so oversized non-streaming
+        # responses can be parsed incrementally; the regular path still
+        # materializes everything via response.content
+        response = self._post(url, payload, stream=True,
+                              body=self._encode_chat_body(payload))
+
         # Handle streaming vs non-streaming response
         if stream:
             # Aggregate streaming response into complete response
@@ -426,108 +1000,554 @@ class ChatCompletions:
                 tool_calls=tool_calls_obj
             )
             
-            logger.info(f"Stream response aggregated - content_len: {len(aggregated.get('content', ''))}, "
-                       f"tool_calls: {len(tool_calls_obj) if tool_calls_obj else 0}")
+            logger.info("Stream response aggregated - content_len: %d, tool_calls: %d",
+                       len(aggregated.get('content', '')),
+                       len(tool_calls_obj) if tool_calls_obj else 0)
             return completion
         else:
-            # Parse non-streaming response
-            response_data = response.json()
-            choices_count = len(response_data.get('choices', []))
-            logger.debug(f"Received non-streaming response with {choices_count} choices")
-            
-            if choices_count == 0:
-                logger.warning("Response contains no choices")
-                # Return empty completion
-                return self._create_completion_from_data(model=model, content="")
-            
-            # Convert response to OpenAI-compatible format
-            choices = []
-            for choice_data in response_data.get("choices", []):
-                message_data = choice_data.get("message", {})
-                
-                # Parse tool_calls separately from content
-                tool_calls_raw = message_data.get("tool_calls")
-                tool_calls_obj = None
-                if tool_calls_raw:
-                    tool_calls_obj = self._parse_tool_calls_from_response(tool_calls_raw)
-                    logger.debug(f"Parsed {len(tool_calls_obj) if tool_calls_obj else 0} tool calls")
-                
-                # Create message with separated fields
-                message = ChatCompletionMessage(
-                    reasoning_content=message_data.get("reasoning_content"),
-                    content=message_data.get("content", ""),
-                    role=message_data.get("role", "assistant"),
-                    tool_calls=tool_calls_obj
-                )
-                choice = ChatCompletionChoice(message=message, index=choice_data.get("index", 0))
-                choices.append(choice)
-            
-            completion = ChatCompletion(choices=choices)
-            completion.model = model
-            logger.info(f"Chat completion created - choices: {len(choices)}, "
-                       f"content_len: {len(choices[0].message.content) if choices else 0}")
-            return completion
+            # Large bodies (per Content-Length) are parsed straight off the
+            # socket; caching needs the full bytes anyway, so it keeps the
+            # whole-body path
+            if cache_key is None and self._should_stream_parse(response):
+                return self._parse_chat_response_stream(response, model)
+            # Parse non-streaming response (orjson works on the raw bytes,
+            # skipping requests' internal text decode)
+            if cache_key is not None:
+                try:
+                    self.cache.set(cache_key, response.content)
+                except Exception as e:
+                    logger.warning("Failed to store response in cache: %s", e)
+            return self._parse_chat_response(self._decode_body(response.content), model)
+
+    def _build_payload(self, model, messages, temperature, top_p, max_tokens,
+                       stop, presence_penalty, logprobs, tools, stream) -> Dict[str, Any]:
+        """Build the /chat/completions request payload (shared by the sync and async paths)."""
+        # The scalar fields are identical across thousands of agent-loop
+        # calls; copy a memoized template and fill in the variable parts
+        payload = _base_payload_template(model, temperature, top_p, max_tokens,
+                                         presence_penalty, stream).copy()
+        payload["messages"] = messages
+        if stop:
+            payload["stop"] = stop
+            logger.debug("Added stop sequences: %s", stop)
+        if logprobs:
+            payload["logprobs"] = logprobs
+        if tools:
+            payload["tools"] = tools
+            logger.debug("Added %d tools to request", len(tools))
+        return payload
+
+    def _get_aclient(self) -> "httpx.AsyncClient":
+        """Lazily create the shared httpx.AsyncClient for the acreate path."""
+        if self._aclient is None:
+            headers = {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.api_key}"
+            }
+            if self._wire_headers:
+                headers.update(self._wire_headers)
+            self._aclient = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+                headers=headers
+            )
+        return self._aclient
+
+    async def acreate(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.6,
+        top_p: float = 0.95,
+        max_tokens: int = 10000,
+        stop: Optional[List[str]] = None,
+        presence_penalty: float = 1.1,
+        logprobs: bool = False,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        **kwargs
+    ) -> ChatCompletion:
+        """
+        Async counterpart of create() (non-streaming). Shares the payload
+        builder and response parser with the sync path; requests go over a
+        lazily created pooled httpx.AsyncClient so N in-flight completions
+        multiply throughput instead of queueing behind one another.
+        """
+        if not model:
+            raise ValueError("Model parameter cannot be empty")
+        if not messages or not isinstance(messages, list):
+            raise ValueError("Messages must be a non-empty list")
+
+        payload = self._build_payload(model, messages, temperature, top_p,
+                                      max_tokens, stop, presence_penalty,
+                                      logprobs, tools, stream=False)
+        client = self._get_aclient()
+        response = await client.post(self._chat_completions_url(),
+                                     content=self._encode_chat_body(payload))
+        response.raise_for_status()
+        return self._parse_chat_response(self._decode_body(response.content), model)
+
+    async def acreate_many(self, calls: List[Dict[str, Any]],
+                           max_concurrency: int = 32) -> List[ChatCompletion]:
+        """
+        Run many acreate() calls concurrently with bounded concurrency.
+        Results preserve input order.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _one(kw):
+            async with semaphore:
+                return await self.acreate(**kw)
+
+        return list(await asyncio.gather(*(_one(kw) for kw in calls)))
+
+    async def aclose(self):
+        """Close the async client, if it was ever created."""
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+
+    def create_batch(
+        self,
+        model: str,
+        prompts: List[str],
+        temperature: float = 0.6,
+        top_p: float = 0.95,
+        max_tokens: int = 10000,
+        stop: Optional[List[str]] = None,
+        **kwargs
+    ) -> List[ChatCompletion]:
+        """
+        Batched completion over the server's native prompt-list support:
+        one HTTP body carries all prompts, letting the engine batch the
+        decodes instead of paying N request round-trips.
+
+        `prompts` are pre-rendered prompt strings for the /completions
+        endpoint (chat conversations must be flattened by the caller; the
+        LightLLM subclass accepts message lists directly). Results are
+        returned in prompt order.
+        """
+        if not prompts:
+            return []
+        payload = {
+            "model": model,
+            "prompt": list(prompts),
+            "temperature": temperature,
+            "top_p": top_p,
+            "max_tokens": max_tokens
+        }
+        if stop:
+            payload["stop"] = stop
+        payload.update(kwargs)
+
+        response = self._post(f"{self.base_url}/completions", payload)
+        data = self._decode_body(response.content)
+
+        choices = sorted(data.get("choices", []), key=lambda c: c.get("index", 0))
+        return [
+            self._create_completion_from_data(model=model, content=choice.get("text", ""))
+            for choice in choices
+        ]
+
+    def create_stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        **kwargs
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Generator variant of create(): yields each SSE delta dict as it
+        arrives instead of aggregating the full response. Useful for
+        time-to-first-token sensitive callers; create(stream=True) remains
+        the aggregate-and-return path.
+
+        Accepts the same keyword arguments as create(). Yields the raw
+        'delta' dict from each chunk (e.g. {'content': '...'}).
+        """
+        if not model:
+            raise ValueError("Model parameter cannot be empty")
+        if not messages or not isinstance(messages, list):
+            raise ValueError("Messages must be a non-empty list")
+
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": True,
+        }
+        for key in ("temperature", "top_p", "max_tokens", "stop",
+                    "presence_penalty", "logprobs", "tools"):
+            if key in kwargs and kwargs[key] is not None:
+                payload[key] = kwargs.pop(key)
+        payload.update(kwargs)
+
+        response = self._session.post(
+            self._chat_completions_url(),
+            data=_json_dumps_bytes(payload),
+            timeout=self.timeout,
+            stream=True
+        )
+        response.raise_for_status()
+
+        for data_str in _iter_sse_data(response):
+            if data_str == b'[DONE]':
+                break
+            try:
+                chunk = _json_loads(data_str)
+            except json.JSONDecodeError as e:
+                logger.warning("Failed to parse stream chunk: %s", e)
+                continue
+            choices = chunk.get('choices')
+            if not choices:
+                continue
+            delta = choices[0].get('delta')
+            if delta:
+                yield delta
+
+    def _choice_from_data(self, choice_data: Dict[str, Any]) -> ChatCompletionChoice:
+        """Convert one response choice dict into a ChatCompletionChoice."""
+        message_data = choice_data.get("message", {})
+
+        # Parse tool_calls separately from content
+        tool_calls_raw = message_data.get("tool_calls")
+        tool_calls_obj = None
+        if tool_calls_raw:
+            tool_calls_obj = self._parse_tool_calls_from_response(tool_calls_raw)
+            logger.debug("Parsed %s tool calls", len(tool_calls_obj) if tool_calls_obj else 0)
+
+        # Create message with separated fields
+        message = ChatCompletionMessage(
+            reasoning_content=message_data.get("reasoning_content"),
+            content=message_data.get("content", ""),
+            role=message_data.get("role", "assistant"),
+            tool_calls=tool_calls_obj
+        )
+        return ChatCompletionChoice(message=message, index=choice_data.get("index", 0))
+
+    def _should_stream_parse(self, response: requests.Response) -> bool:
+        """Whether a non-streaming body is big enough to parse incrementally."""
+        if ijson is None or self._msgpack is not None:
+            return False
+        try:
+            return int(response.headers.get("Content-Length", 0)) >= _STREAM_PARSE_MIN_BYTES
+        except (TypeError, ValueError):
+            return False
+
+    def _parse_chat_response_stream(self, response: requests.Response,
+                                    model: str) -> ChatCompletion:
+        """
+        Incrementally parse a large /chat/completions body with ijson,
+        building choices straight off the socket so the raw bytes and the
+        parsed tree never coexist in memory.
+        """
+        response.raw.decode_content = True
+        try:
+            choices = [self._choice_from_data(choice_data)
+                       for choice_data in ijson.items(response.raw, 'choices.item')]
+        finally:
+            response.close()
+
+        if not choices:
+            logger.warning("Response contains no choices")
+            return self._create_completion_from_data(model=model, content="")
+
+        completion = ChatCompletion(choices=choices)
+        completion.model = model
+        logger.info("Chat completion created - choices: %s, content_len: %s",
+                    len(choices), len(choices[0].message.content))
+        return completion
+
+    def _parse_chat_response(self, response_data: Dict[str, Any], model: str) -> ChatCompletion:
+        """Convert a parsed /chat/completions response dict into a ChatCompletion."""
+        choices_count = len(response_data.get('choices', []))
+        logger.debug("Received non-streaming response with %s choices", choices_count)
+
+        if choices_count == 0:
+            logger.warning("Response contains no choices")
+            # Return empty completion
+            return self._create_completion_from_data(model=model, content="")
+
+        # Convert response to OpenAI-compatible format
+        choices = [self._choice_from_data(choice_data)
+                   for choice_data in response_data.get("choices", [])]
+
+        completion = ChatCompletion(choices=choices)
+        completion.model = model
+        logger.info("Chat completion created - choices: %s, content_len: %s",
+                    len(choices), len(choices[0].message.content) if choices else 0)
+        return completion
+
+    def create_many(self, calls: List[Dict[str, Any]], max_workers: int = 16) -> List[ChatCompletion]:
+        """
+        Fan out independent create() calls over the shared connection pool.
+
+        Each entry in `calls` is a kwargs dict for create(). Results come back
+        in the same order as the inputs. Because all workers share this
+        instance's pooled Session, concurrent requests reuse keep-alive
+        sockets instead of paying a handshake per call.
+        """
+        if not calls:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as executor:
+            return list(executor.map(lambda kw: self.create(**kw), calls))
+
+# Mirrors the tools branch of chat_template.jinja. Rendered through Jinja so
+# the |tojson output stays byte-identical to what the main template produced.
+_TOOLS_PREAMBLE_SOURCE = (
+    '{{- "# Tools\\n\\nYou may call one or more functions to assist with the user query.'
+    '\\n\\nYou are provided with function signatures within <tools></tools> XML tags:\\n<tools>" }}'
+    '{%- for tool in tools %}'
+    '{{- "\\n" }}'
+    '{{- tool | tojson }}'
+    '{%- endfor %}'
+    '{{- "\\n</tools>\\n\\nFor each function call, return a json object with function name and'
+    ' arguments within <tool_call></tool_call> XML tags:\\n<tool_call>\\n{\\"name\\":'
+    ' <function-name>, \\"arguments\\": <args-json-object>}\\n</tool_call>" }}'
+)
+
+# Tool lists are reused unchanged across dozens of agent-loop turns, so a
+# handful of cache slots covers every live configuration
+_TOOL_PROMPT_CACHE_SIZE = 8
+
+# Encoded images kept per client before LRU eviction
+_IMAGE_CACHE_SIZE = 128
+
+
+@functools.lru_cache(maxsize=1)
+def _lightllm_template_env() -> Environment:
+    """
+    Process-wide Jinja environment for the LightLLM chat template. Building
+    an Environment and re-parsing chat_template.jinja per client adds up for
+    callers that create a client per request; auto_reload=False also skips
+    the stat() check Jinja would otherwise do on every render.
+    """
+    return Environment(loader=FileSystemLoader('inference/template'),
+                       auto_reload=False, cache_size=50)
+
+
+@functools.lru_cache(maxsize=1)
+def _lightllm_chat_template():
+    """The compiled chat_template.jinja, loaded once per process."""
+    return _lightllm_template_env().get_template('chat_template.jinja')
+
 
 class lightllm_ChatCompletions(ChatCompletions):
     """Mimics OpenAI's chat.completions API for LightLLM with streaming support"""
-    def __init__(self, api_key, base_url, timeout = 600):
-        env = Environment(loader=FileSystemLoader('inference/template'))
-        self.template = env.get_template('chat_template.jinja')
-        super().__init__(api_key, base_url, timeout)
-        logger.info(f"LightLLM ChatCompletions initialized with base_url: {self.base_url}")
+    __slots__ = ("template", "_tools_preamble_template", "_tool_prompt_cache",
+                 "_image_cache", "_io_pool", "_use_openai_endpoint",
+                 "_openai_base_url", "_default_params")
+
+    def __init__(self, api_key, base_url, timeout = 600, session = None, cache = None):
+        env = _lightllm_template_env()
+        self.template = _lightllm_chat_template()
+        self._tools_preamble_template = env.from_string(_TOOLS_PREAMBLE_SOURCE)
+        self._tool_prompt_cache = collections.OrderedDict()
+        # Conversations frequently repeat the same image URL across turns;
+        # cache the encoded result so each image is fetched once
+        self._image_cache = collections.OrderedDict()
+        # I/O pool for fetching multi-image attachments concurrently;
+        # threads spawn on first use, so unused pools cost nothing
+        self._io_pool = ThreadPoolExecutor(max_workers=8)
+        super().__init__(api_key, base_url, timeout, session=session, cache=cache)
+        # Probed lazily on the first create(); None means "not yet probed".
+        self._use_openai_endpoint = None
+        self._openai_base_url = (
+            self.base_url[:-len('/generate')]
+            if self.base_url.endswith('/generate') else self.base_url
+        )
+        # Stable generation defaults; create() copies this and overwrites the
+        # per-call tunables instead of rebuilding the nested dict every time
+        self._default_params = {
+            "temperature": 0.6,
+            "top_k": 50,
+            "top_p": 0.95,
+            "repetition_penalty": 1.0,
+            "max_new_tokens": 10000,
+            "do_sample": True,
+            "stop_sequences": ["<|im_end|>"]
+        }
+        logger.info("LightLLM ChatCompletions initialized with base_url: %s", self.base_url)
+
+    def _chat_completions_url(self) -> str:
+        return f"{self._openai_base_url}/chat/completions"
+
+    def _openai_endpoint_available(self) -> bool:
+        """
+        Check (once per process) whether the LightLLM server also exposes an
+        OpenAI-compatible /chat/completions endpoint. When it does, we can
+        skip the client-side template rendering entirely and let the server
+        apply its own chat template. The probe result is memoized in
+        _ENDPOINT_PROBES so short-lived clients against the same server
+        never re-pay the HEAD round-trip.
+
+        Set LIGHTLLM_USE_OPENAI_ENDPOINT=true/false to bypass the probe.
+        """
+        if self._use_openai_endpoint is None:
+            override = os.getenv("LIGHTLLM_USE_OPENAI_ENDPOINT", "auto").lower()
+            if override in ("true", "1"):
+                self._use_openai_endpoint = True
+            elif override in ("false", "0"):
+                self._use_openai_endpoint = False
+            else:
+                url = self._chat_completions_url()
+                with _ENDPOINT_PROBES_LOCK:
+                    available = _ENDPOINT_PROBES.get(url)
+                if available is None:
+                    try:
+                        probe = self._session.head(url, timeout=2)
+                        available = probe.status_code not in (404, 501)
+                    except requests.exceptions.RequestException:
+                        available = False
+                    with _ENDPOINT_PROBES_LOCK:
+                        _ENDPOINT_PROBES[url] = available
+                self._use_openai_endpoint = available
+            logger.info("LightLLM OpenAI-compatible endpoint available: %s", self._use_openai_endpoint)
+        return self._use_openai_endpoint
+
+    def _tools_preamble(self, tools):
+        """
+        Render the tools system-prompt block, memoized per tools list.
+        Re-serializing every tool schema to JSON on each call is pure waste
+        in multi-turn loops where the tools never change.
+        """
+        # Content-based key: identical tool schemas hit the cache even when
+        # the caller rebuilds the list object between turns
+        key = tuple(_canonical_dumps_bytes(t) for t in tools)
+        cached = self._tool_prompt_cache.get(key)
+        if cached is not None:
+            self._tool_prompt_cache.move_to_end(key)
+            return cached
+        preamble = self._tools_preamble_template.render(tools=tools)
+        self._tool_prompt_cache[key] = preamble
+        if len(self._tool_prompt_cache) > _TOOL_PROMPT_CACHE_SIZE:
+            self._tool_prompt_cache.popitem(last=False)
+        return preamble
 
     def handle_url_sync(self, url):
         """Synchronous version of handle_url for processing image URLs"""
+        cached = self._image_cache.get(url)
+        if cached is not None:
+            self._image_cache.move_to_end(url)
+            return cached
         try:
             if url.startswith("file://"):
+                # mmap the file so b64encode reads straight from the page
+                # cache instead of an extra full-size bytes copy
                 with open(url[7:], "rb") as f:
-                    return base64.b64encode(f.read()).decode()
+                    if os.fstat(f.fileno()).st_size == 0:
+                        encoded = ""
+                    else:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            encoded = _b64.b64encode(mm).decode('ascii')
             else:
-                response = requests.get(url, timeout=30)
+                # Suppress the session's Bearer auth header: image URLs
+                # point at arbitrary external hosts that must not see the
+                # inference API key (a None value removes the header for
+                # this request only, keeping the pooled connections)
+                response = self._session.get(url, timeout=30, stream=True,
+                                             headers={"Authorization": None})
                 response.raise_for_status()
-                content = response.content
-                return base64.b64encode(content).decode()
+                content = bytearray()
+                for chunk in response.iter_content(64 * 1024):
+                    content += chunk
+                encoded = _b64.b64encode(content).decode('ascii')
         except Exception as e:
-            logger.error(f"Failed to handle URL {url}: {e}")
+            logger.error("Failed to handle URL %s: %s", url, e)
             raise
-    
+        self._image_cache[url] = encoded
+        if len(self._image_cache) > _IMAGE_CACHE_SIZE:
+            self._image_cache.popitem(last=False)
+        return encoded
+
+    def handle_urls_sync(self, urls):
+        """
+        Encode several image URLs concurrently over the I/O pool. Fetches
+        are network-bound, so N-image attachments cost roughly one RTT of
+        wall clock instead of the sum. Results preserve input order.
+        """
+        if not urls:
+            return []
+        if len(urls) == 1:
+            return [self.handle_url_sync(urls[0])]
+        return list(self._io_pool.map(self.handle_url_sync, urls))
+
+    def _render_fast(self, messages) -> Optional[str]:
+        """
+        Specialized renderer for the dominant agent-loop shape: tool-free
+        conversations of plain-string system/user/assistant messages. For
+        that subset the template reduces to one '<|im_start|>role\\ncontent
+        <|im_end|>\\n' block per message, so a tight Python loop produces
+        byte-identical output without invoking Jinja. Returns None when the
+        messages fall outside the subset (caller falls back to the template).
+        """
+        parts = []
+        for m in messages:
+            role = m.get("role")
+            content = m.get("content")
+            if type(content) is not str or role not in ("system", "user", "assistant"):
+                return None
+            if role == "assistant" and (
+                "</think>" in content
+                or m.get("reasoning_content") is not None
+                or m.get("tool_calls")
+            ):
+                return None
+            parts.append(f"<|im_start|>{role}\n{content}<|im_end|>\n")
+        return "".join(parts)
+
+    @staticmethod
+    def _build_call(index: int, toolcall_str: str, failures: List[str],
+                    ts: int) -> Optional[ToolCall]:
+        """Build one ToolCall from a matched <tool_call> JSON payload;
+        records unparseable payloads in `failures` instead of raising.
+        `ts` is the per-response timestamp shared by all call ids."""
+        try:
+            toolcall_json = _json_loads(toolcall_str)
+        except json.JSONDecodeError:
+            failures.append(toolcall_str)
+            return None
+        # Pass the parsed arguments object straight through: re-encoding it
+        # here only for downstream consumers to json.loads it again is a
+        # pure round-trip (ToolCallFunction re-serializes lazily if the
+        # wire-format string is ever asked for)
+        return ToolCall(
+            id=f"call_{index}_{ts}",
+            type="function",
+            function=ToolCallFunction(
+                name=toolcall_json.get("name", ""),
+                arguments=toolcall_json.get("arguments", {})
+            )
+        )
+
     def _parse_lightllm_response(self, response_text: str) -> Dict[str, Any]:
         """
         Parse LightLLM response text to extract content, reasoning, and tool calls.
         Returns dict with separated fields.
         """
+        # The stop sequence may be echoed back at the end of the generation;
+        # drop it so downstream consumers never see the template token
+        if response_text.endswith("<|im_end|>"):
+            response_text = response_text[:-len("<|im_end|>")]
+
         # Extract reasoning content
-        reasoning_content = None
-        reasoning_match = re.compile(r"<think>\n(.*?)\n</think>", re.DOTALL).search(response_text)
-        if reasoning_match:
-            reasoning_content = reasoning_match.group(1).strip()
-            logger.debug(f"Extracted reasoning content: {len(reasoning_content)} chars")
-        
-        # Parse tool calls from response
-        toolcall_pattern = re.compile(r"<tool_call>\s*(\{.*?\})\s*</tool_call>", re.DOTALL)
-        toolcalls_matches = toolcall_pattern.findall(response_text)
-        
-        # Build tool_calls list in OpenAI format
+        reasoning_content = _scan_think_block(response_text)
+        if reasoning_content is not None:
+            reasoning_content = reasoning_content.strip()
+            logger.debug("Extracted reasoning content: %s chars", len(reasoning_content))
+
+        # Parse tool calls in a single pass over the text; malformed blocks
+        # are collected and logged once instead of per-iteration
         tool_calls_list = None
-        if toolcalls_matches:
-            tool_calls_list = []
-            for i, toolcall_str in enumerate(toolcalls_matches):
-                try:
-                    toolcall_json = json.loads(toolcall_str)
-                    function = ToolCallFunction(
-                        name=toolcall_json.get("name", ""),
-                        arguments=json.dumps(toolcall_json.get("arguments", {}))
-                    )
-                    tool_call = ToolCall(
-                        id=f"call_{i}_{int(time.time())}",
-                        type="function",
-                        function=function
-                    )
-                    tool_calls_list.append(tool_call)
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Failed to parse tool call: {toolcall_str}, error: {e}")
-            
-            logger.debug(f"Parsed {len(tool_calls_list)} tool calls")
+        failures = []
+        ts = int(time.time())
+        for i, block in enumerate(_scan_toolcall_blocks(response_text)):
+            if tool_calls_list is None:
+                tool_calls_list = []
+            call = self._build_call(i, block, failures, ts)
+            if call is not None:
+                tool_calls_list.append(call)
+        if failures:
+            logger.warning("Failed to parse %d tool call(s): %s", len(failures), failures)
+        if tool_calls_list is not None:
+            logger.debug("Parsed %s tool calls", len(tool_calls_list))
         
         return {
             'content': response_text,
@@ -545,58 +1565,73 @@ class lightllm_ChatCompletions(ChatCompletions):
         - List responses
         """
         logger.info("Processing LightLLM streaming response")
-        aggregated_text = ""
+        aggregated_parts = []
         chunk_count = 0
-        
+        debug = logger.isEnabledFor(logging.DEBUG)
+
         try:
-            for line in response.iter_lines():
+            for line in _iter_lines_fast(response):
                 if not line:
                     continue
-                
+
                 chunk_count += 1
                 try:
                     line = line.decode('utf-8').strip()
                 except UnicodeDecodeError as e:
-                    logger.warning(f"Failed to decode line in chunk {chunk_count}: {e}")
+                    logger.warning("Failed to decode line in chunk %d: %s", chunk_count, e)
                     continue
-                
+
                 if not line:
                     continue
-                
-                # LightLLM may use different streaming format
-                # Try to parse as JSON first
+
+                # LightLLM may use different streaming format. Sniff the
+                # first byte before attempting a JSON parse: plain-text
+                # token streams would otherwise raise (and pay for)
+                # JSONDecodeError on every single token
+                if line[0] not in '{[':
+                    aggregated_parts.append(line)
+                    if debug:
+                        logger.debug("Chunk %s: Added plain text", chunk_count)
+                    continue
                 try:
-                    chunk = json.loads(line)
-                    if isinstance(chunk, dict):
-                        # Handle dict response
-                        if 'token' in chunk:
-                            token_text = chunk['token'].get('text', '')
-                            aggregated_text += token_text
-                            logger.debug(f"Chunk {chunk_count}: Added token text")
-                        elif 'generated_text' in chunk:
-                            # Some implementations return full text in chunks
-                            aggregated_text = chunk['generated_text']
-                            logger.debug(f"Chunk {chunk_count}: Got full generated_text")
-                        elif 'text' in chunk:
-                            aggregated_text += chunk['text']
-                            logger.debug(f"Chunk {chunk_count}: Added text")
-                        else:
-                            logger.debug(f"Chunk {chunk_count}: Unrecognized dict format: {list(chunk.keys())}")
-                    elif isinstance(chunk, list) and len(chunk) > 0:
-                        # Handle list response
-                        if 'generated_text' in chunk[0]:
-                            aggregated_text = chunk[0]['generated_text']
-                            logger.debug(f"Chunk {chunk_count}: Got generated_text from list")
+                    chunk = _json_loads(line)
                 except json.JSONDecodeError:
-                    # Not JSON, might be plain text tokens
-                    aggregated_text += line
-                    logger.debug(f"Chunk {chunk_count}: Added plain text")
-        
+                    # JSON-looking but unparseable; treat as plain text
+                    aggregated_parts.append(line)
+                    if debug:
+                        logger.debug("Chunk %s: Added plain text", chunk_count)
+                    continue
+                if isinstance(chunk, dict):
+                    # Handle dict response
+                    if 'token' in chunk:
+                        aggregated_parts.append(chunk['token'].get('text', ''))
+                        if debug:
+                            logger.debug("Chunk %s: Added token text", chunk_count)
+                    elif 'generated_text' in chunk:
+                        # Some implementations return full text in chunks
+                        aggregated_parts = [chunk['generated_text']]
+                        if debug:
+                            logger.debug("Chunk %s: Got full generated_text", chunk_count)
+                    elif 'text' in chunk:
+                        aggregated_parts.append(chunk['text'])
+                        if debug:
+                            logger.debug("Chunk %s: Added text", chunk_count)
+                    elif debug:
+                        logger.debug("Chunk %s: Unrecognized dict format: %s", chunk_count, list(chunk.keys()))
+                elif isinstance(chunk, list) and len(chunk) > 0:
+                    # Handle list response
+                    if 'generated_text' in chunk[0]:
+                        aggregated_parts = [chunk[0]['generated_text']]
+                        if debug:
+                            logger.debug("Chunk %s: Got generated_text from list", chunk_count)
+
         except Exception as e:
-            logger.error(f"Error processing LightLLM stream at chunk {chunk_count}: {e}")
+            logger.error("Error processing LightLLM stream at chunk %d: %s", chunk_count, e)
             raise
-        
-        logger.info(f"LightLLM stream aggregation complete - chunks: {chunk_count}, text_len: {len(aggregated_text)}")
+
+        aggregated_text = ''.join(aggregated_parts)
+        logger.info("LightLLM stream aggregation complete - chunks: %d, text_len: %d",
+                   chunk_count, len(aggregated_text))
         
         if not aggregated_text:
             logger.warning("LightLLM stream aggregation resulted in empty text")
@@ -633,136 +1668,267 @@ class lightllm_ChatCompletions(ChatCompletions):
             raise ValueError("Model parameter cannot be empty")
         
         if not messages or not isinstance(messages, list):
-            logger.error(f"Invalid messages parameter: {type(messages)}")
+            logger.error("Invalid messages parameter: %s", type(messages))
             raise ValueError("Messages must be a non-empty list")
-        
-        logger.info(f"LightLLM create - model: {model}, stream: {stream}, "
-                   f"has_tools: {tools is not None}, messages_count: {len(messages)}")
-        
-        # 使用jinja模板组织输入
-        try:
-            query = self.template.render(
+
+        logger.info("LightLLM create - model: %s, stream: %s, "
+                   "has_tools: %s, messages_count: %d",
+                   model, stream, tools is not None, len(messages))
+
+        # Prefer the server-side chat template when the backend exposes an
+        # OpenAI-compatible endpoint: no client-side rendering or re-parsing.
+        if self._openai_endpoint_available():
+            return super().create(
+                model=model,
                 messages=messages,
-                tools=tools if tools else [],
-                enable_thinking=False,
-                today_date=self.today_date()
+                temperature=temperature,
+                top_p=top_p,
+                max_tokens=max_tokens,
+                stop=stop,
+                presence_penalty=presence_penalty,
+                logprobs=logprobs,
+                tools=tools,
+                stream=stream,
+                **kwargs
             )
-            logger.debug(f"Constructed query with template - query_len: {len(query)}")
-        except Exception as e:
-            logger.error(f"Failed to render template: {e}")
-            raise ValueError(f"Template rendering failed: {e}")
-        
-        # Construct the payload for LightLLM API
-        payload = {
-            "inputs": query,
-            "parameters": {
-                "temperature": temperature,
-                "top_k": top_k,
-                "top_p": top_p,
-                "repetition_penalty": repetition_penalty,
-                "max_new_tokens": max_tokens,
-                "do_sample": True,
-                "stop_sequences": ["<|im_end|>"]
-            },
-            "stream": stream
-        }
 
-        # Make synchronous HTTP request
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
-        try:
-            response = requests.post(
-                self.base_url,
-                headers=headers,
-                json=payload,
-                timeout=self.timeout,
-                stream=stream
-            )
-            response.raise_for_status()
-        except requests.exceptions.Timeout as e:
-            logger.error(f"LightLLM request timeout after {self.timeout}s: {e}")
-            raise
-        except requests.exceptions.ConnectionError as e:
-            logger.error(f"LightLLM connection error to {self.base_url}: {e}")
-            raise
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"LightLLM HTTP error {response.status_code}: {e}")
-            # Try to log response body for debugging
-            try:
-                error_body = response.text[:500]
-                logger.error(f"Error response body: {error_body}")
-            except:
-                pass
-            raise
-        except requests.exceptions.RequestException as e:
-            logger.error(f"LightLLM request failed: {e}")
-            raise
-        
+        payload = self._build_lightllm_payload(messages, tools, temperature,
+                                               top_k, top_p, repetition_penalty,
+                                               max_tokens, stream)
+
+        # Content-Type and Authorization are set once on the session in
+        # __init__. stream=True defers the body download so oversized
+        # non-streaming responses can be parsed incrementally.
+        response = self._post(self.base_url, payload, stream=True,
+                              error_prefix="LightLLM ")
+
         # Handle streaming vs non-streaming
         if stream:
             # Aggregate streaming response
             response_text = self._aggregate_lightllm_stream(response)
+        elif self._should_stream_parse(response):
+            response_text = self._extract_generated_text_stream(response)
         else:
-            # Parse non-streaming response
-            try:
-                response_data = response.json()
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse LightLLM response as JSON: {e}")
-                logger.error(f"Response text: {response.text[:500]}")
-                raise ValueError(f"Invalid JSON response from LightLLM: {e}")
-            
-            logger.debug(f"Received LightLLM response: {type(response_data)}")
-            
-            # Parse the generated text with error handling
-            try:
-                if isinstance(response_data, list):
-                    if not response_data:
-                        raise ValueError("Empty response list from LightLLM")
-                    generated = response_data[0].get("generated_text", [""])
-                    response_text = generated[0] if isinstance(generated, list) else generated
+            response_text = self._extract_generated_text(response.content)
+
+        return self._completion_from_text(model, response_text)
+
+    def _build_lightllm_payload(self, messages, tools, temperature, top_k,
+                                top_p, repetition_penalty, max_tokens,
+                                stream) -> Dict[str, Any]:
+        """Render the prompt and build the LightLLM request payload
+        (shared by the sync and async paths)."""
+        # 使用jinja模板组织输入
+        try:
+            today_date = self.today_date()
+            if tools:
+                # Inject the cached tools preamble through the system message
+                # so the template renders its (cheaper) tool-free branch; the
+                # output is byte-identical to the template's tools branch.
+                tool_block = self._tools_preamble(tools) + f'\nCurrent date: "{today_date}'
+                if messages and messages[0].get("role") == "system":
+                    sys_content = messages[0]["content"] + "\n\n" + tool_block
+                    render_messages = [{"role": "system", "content": sys_content}] + list(messages[1:])
                 else:
-                    generated = response_data.get("generated_text", [""])
-                    response_text = generated[0] if isinstance(generated, list) else generated
-                
-                if not response_text:
-                    logger.warning("LightLLM returned empty generated_text")
-                    response_text = ""
-            except (KeyError, IndexError, TypeError) as e:
-                logger.error(f"Failed to extract generated_text from response: {e}")
-                logger.error(f"Response structure: {response_data}")
-                raise ValueError(f"Unexpected LightLLM response format: {e}")
+                    render_messages = [{"role": "system", "content": tool_block}] + list(messages)
+            else:
+                render_messages = messages
+            # Common case first: plain-string conversations skip Jinja entirely
+            query = self._render_fast(render_messages)
+            if query is None:
+                query = self.template.render(
+                    messages=render_messages,
+                    tools=[],
+                    enable_thinking=False,
+                    today_date=today_date
+                )
+            logger.debug("Constructed query with template - query_len: %s", len(query))
+        except Exception as e:
+            logger.error("Failed to render template: %s", e)
+            raise ValueError(f"Template rendering failed: {e}")
         
-        # Parse response to extract separated fields
+        # Construct the payload for LightLLM API, starting from the cached
+        # defaults and only overwriting the per-call tunables
+        params = self._default_params.copy()
+        params["temperature"] = temperature
+        params["top_k"] = top_k
+        params["top_p"] = top_p
+        params["repetition_penalty"] = repetition_penalty
+        params["max_new_tokens"] = max_tokens
+        return {
+            "inputs": query,
+            "parameters": params,
+            "stream": stream
+        }
+
+    def _extract_generated_text(self, body: bytes) -> str:
+        """Pull generated_text out of a non-streaming LightLLM response body."""
+        try:
+            response_data = _json_loads(body)
+        except json.JSONDecodeError as e:
+            logger.error("Failed to parse LightLLM response as JSON: %s", e)
+            logger.error("Response text: %s", body[:500])
+            raise ValueError(f"Invalid JSON response from LightLLM: {e}")
+
+        logger.debug("Received LightLLM response: %s", type(response_data))
+
+        # Parse the generated text with error handling. One normalization
+        # step covers both shapes (dict or single-element-list root, string
+        # or list-valued generated_text); type() is a pointer compare where
+        # isinstance walks the MRO
+        try:
+            if type(response_data) is list:
+                if not response_data:
+                    raise ValueError("Empty response list from LightLLM")
+                response_data = response_data[0]
+            generated = response_data.get("generated_text", "")
+            response_text = generated[0] if type(generated) is list else generated
+
+            if not response_text:
+                logger.warning("LightLLM returned empty generated_text")
+                response_text = ""
+        except (KeyError, IndexError, TypeError) as e:
+            logger.error("Failed to extract generated_text from response: %s", e)
+            logger.error("Response structure: %s", response_data)
+            raise ValueError(f"Unexpected LightLLM response format: {e}")
+        return response_text
+
+    def _extract_generated_text_stream(self, response: requests.Response) -> str:
+        """
+        Pull generated_text out of a large non-streaming body with ijson,
+        short-circuiting as soon as the first string is seen instead of
+        materializing the whole parsed tree. Handles the same shapes as
+        _extract_generated_text: dict or single-element-list roots, with
+        generated_text as a string or a list of strings.
+        """
+        response.raw.decode_content = True
+        try:
+            for prefix, event, value in ijson.parse(response.raw):
+                if event == 'string' and (
+                    prefix.endswith('generated_text')
+                    or prefix.endswith('generated_text.item')
+                ):
+                    return value
+        finally:
+            response.close()
+        logger.warning("LightLLM returned empty generated_text")
+        return ""
+
+    def _completion_from_text(self, model: str, response_text: str) -> ChatCompletion:
+        """Parse separated fields out of the generated text and wrap them
+        in an OpenAI-compatible completion."""
         parsed = self._parse_lightllm_response(response_text)
-        
-        # Create OpenAI-compatible response with separated fields using helper
+
         completion = self._create_completion_from_data(
             model=model,
             content=parsed['content'],
             reasoning_content=parsed['reasoning_content'],
             tool_calls=parsed['tool_calls']
         )
-        
-        logger.info(f"LightLLM completion created - content_len: {len(parsed['content'])}, "
-                   f"has_reasoning: {parsed['reasoning_content'] is not None}, "
-                   f"has_tool_calls: {parsed['tool_calls'] is not None}")
-        
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("LightLLM completion created - content_len: %s, "
+                        "has_reasoning: %s, has_tool_calls: %s",
+                        len(parsed['content']),
+                        parsed['reasoning_content'] is not None,
+                        parsed['tool_calls'] is not None)
+
         return completion
-    
+
+    def create_batch(
+        self,
+        model: str,
+        messages_list: List[List[Dict[str, str]]],
+        temperature: float = 0.6,
+        top_p: float = 0.95,
+        max_tokens: int = 10000,
+        top_k: int = 50,
+        repetition_penalty: float = 1.0,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        **kwargs
+    ) -> List[ChatCompletion]:
+        """
+        Batched variant for LightLLM's /generate_batch: renders every
+        conversation client-side and sends the list of inputs in a single
+        request so the engine batches the decodes. Results map back
+        positionally.
+        """
+        if not messages_list:
+            return []
+        inputs = []
+        params = None
+        for messages in messages_list:
+            payload = self._build_lightllm_payload(
+                messages, tools, temperature, top_k, top_p,
+                repetition_penalty, max_tokens, stream=False)
+            inputs.append(payload["inputs"])
+            params = payload["parameters"]
+
+        batch_url = f"{self._openai_base_url}/generate_batch"
+        response = self._post(batch_url, {"inputs": inputs, "parameters": params},
+                              error_prefix="LightLLM ")
+        data = _json_loads(response.content)
+
+        items = data if isinstance(data, list) else data.get("responses", [])
+        completions = []
+        for item in items:
+            generated = item.get("generated_text", [""])
+            text = generated[0] if isinstance(generated, list) else generated
+            completions.append(self._completion_from_text(model, text))
+        return completions
+
+    async def acreate(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.6,
+        top_p: float = 0.95,
+        max_tokens: int = 10000,
+        stop: Optional[List[str]] = None,
+        presence_penalty: float = 1.1,
+        logprobs: bool = False,
+        tools: Optional[List[Dict[str, Any]]] = None,
+        top_k: int = 50,
+        repetition_penalty: float = 1.0,
+        **kwargs
+    ) -> ChatCompletion:
+        """
+        Async counterpart of create() (non-streaming): renders the prompt
+        with the same fast path / template, posts over the shared
+        httpx.AsyncClient and parses the generated text identically.
+        """
+        if not model:
+            raise ValueError("Model parameter cannot be empty")
+        if not messages or not isinstance(messages, list):
+            raise ValueError("Messages must be a non-empty list")
+
+        payload = self._build_lightllm_payload(messages, tools, temperature,
+                                               top_k, top_p, repetition_penalty,
+                                               max_tokens, stream=False)
+        client = self._get_aclient()
+        response = await client.post(self.base_url,
+                                     content=_json_dumps_bytes(payload))
+        response.raise_for_status()
+        return self._completion_from_text(
+            model, self._extract_generated_text(response.content))
+
 
 class Chat:
     """Mimics OpenAI's chat API"""
-    def __init__(self, api_key: str, base_url: str, timeout: float = 600.0):
-        self.completions = ChatCompletions(api_key, base_url, timeout)
+    __slots__ = ("completions",)
+
+    def __init__(self, api_key: str, base_url: str, timeout: float = 600.0,
+                 session: Optional[requests.Session] = None):
+        self.completions = ChatCompletions(api_key, base_url, timeout, session=session)
 
 
 class lightllm_Chat:
     """Mimics OpenAI's chat API for LightLLM"""
-    def __init__(self, api_key: str, base_url: str, timeout: float = 600.0):
-        self.completions = lightllm_ChatCompletions(api_key, base_url, timeout)
+    __slots__ = ("completions",)
+
+    def __init__(self, api_key: str, base_url: str, timeout: float = 600.0,
+                 session: Optional[requests.Session] = None):
+        self.completions = lightllm_ChatCompletions(api_key, base_url, timeout, session=session)
 
 
 class OpenAICompatibleClient:
@@ -773,10 +1939,12 @@ class OpenAICompatibleClient:
     client = OpenAICompatibleClient(api_key="...", base_url="...")
     response = client.chat.completions.create(...)
     """
+    __slots__ = ("api_key", "base_url", "timeout", "_session", "chat")
+
     def __init__(self, api_key: str, base_url: str, timeout: float = 600.0):
         """
         Initialize the OpenAI-compatible client.
-        
+
         Args:
             api_key: API key for authentication
             base_url: Base URL for the API endpoint
@@ -785,7 +1953,24 @@ class OpenAICompatibleClient:
         self.api_key = api_key
         self.base_url = base_url
         self.timeout = timeout
-        self.chat = Chat(api_key, base_url, timeout)
+        # All sub-objects share the process-wide pool for this key, so
+        # callers that build a client per request still reuse keep-alive
+        # connections instead of re-handshaking every time
+        self._session = _shared_session(api_key)
+        _prewarm_session(self._session, base_url)
+        self.chat = Chat(api_key, base_url, timeout, session=self._session)
+
+    def close(self):
+        """
+        No-op kept for API compatibility: the session comes from the
+        process-wide pool and is shared with other clients.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
 
 class LightLLMClient:
@@ -801,10 +1986,12 @@ class LightLLMClient:
     client = LightLLMClient(api_key="...", base_url="...")
     response = client.chat.completions.create(model="...", messages=[...], tools=[...])
     """
+    __slots__ = ("api_key", "base_url", "timeout", "_session", "chat")
+
     def __init__(self, api_key: str, base_url: str, timeout: float = 600.0):
         """
         Initialize the LightLLM client.
-        
+
         Args:
             api_key: API key for authentication
             base_url: Base URL for the LightLLM API endpoint
@@ -813,7 +2000,24 @@ class LightLLMClient:
         self.api_key = api_key
         self.base_url = base_url
         self.timeout = timeout
-        self.chat = lightllm_Chat(api_key, base_url, timeout)
+        # All sub-objects share the process-wide pool for this key, so
+        # callers that build a client per request still reuse keep-alive
+        # connections instead of re-handshaking every time
+        self._session = _shared_session(api_key)
+        _prewarm_session(self._session, base_url)
+        self.chat = lightllm_Chat(api_key, base_url, timeout, session=self._session)
+
+    def close(self):
+        """
+        No-op kept for API compatibility: the session comes from the
+        process-wide pool and is shared with other clients.
+        """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
 
 # Exception classes to maintain compatibility
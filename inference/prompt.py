@@ -1,3 +1,4 @@
+import json
 import os
 
 # Default system prompt template
@@ -14,25 +15,34 @@ TOOL_DEFINITIONS = {
     "parse_file": '{"type": "function", "function": {"name": "parse_file", "description": "This is a tool that can be used to parse multiple user uploaded local files such as PDF, DOCX, PPTX, TXT, CSV, XLSX, DOC, ZIP, MP4, MP3.", "parameters": {"type": "object", "properties": {"files": {"type": "array", "items": {"type": "string"}, "description": "The file name of the user uploaded local files to be parsed."}}, "required": ["files"]}}}'
 }
 
+# The schemas above parsed once at import; consumers that need the dict
+# form (e.g. building the tools payload each turn) read these instead of
+# re-running json.loads per call
+TOOL_DEFINITIONS_PARSED = {
+    name: json.loads(definition)
+    for name, definition in TOOL_DEFINITIONS.items()
+}
+
+# Environment overrides are read once at import: agent loops call the
+# prompt getters every turn and the values cannot change mid-process.
+_CUSTOM_SYSTEM_PROMPT = os.getenv('SYSTEM_PROMPT')
+_CUSTOM_EXTRACTOR_PROMPT = os.getenv('EXTRACTOR_PROMPT')
+
 def get_system_prompt(enabled_tools=None):
     """
     Get the system prompt with tools dynamically filtered based on enabled_tools.
-    
+
     Args:
         enabled_tools: List of enabled tool names, or None to enable all tools
-    
+
     Returns:
         System prompt string with appropriate tool definitions
     """
-    # Load custom system prompt from environment if available
-    custom_prompt = os.getenv('SYSTEM_PROMPT')
-    if custom_prompt:
-        return custom_prompt
-    
-    return DEFAULT_SYSTEM_PROMPT
+    # Custom system prompt from the environment takes precedence
+    if _CUSTOM_SYSTEM_PROMPT:
+        return _CUSTOM_SYSTEM_PROMPT
 
-# For backward compatibility
-SYSTEM_PROMPT = get_system_prompt()
+    return DEFAULT_SYSTEM_PROMPT
 
 # Default extractor prompt
 DEFAULT_EXTRACTOR_PROMPT = """Please process the following webpage content and user goal to extract relevant information:
@@ -53,7 +63,14 @@ DEFAULT_EXTRACTOR_PROMPT = """Please process the following webpage content and u
 
 def get_extractor_prompt():
     """Get the extractor prompt from environment or use default."""
-    return os.getenv('EXTRACTOR_PROMPT', DEFAULT_EXTRACTOR_PROMPT)
+    return _CUSTOM_EXTRACTOR_PROMPT or DEFAULT_EXTRACTOR_PROMPT
+
 
-# For backward compatibility
-EXTRACTOR_PROMPT = get_extractor_prompt()
+def __getattr__(name):
+    # Backward-compatible module constants, resolved lazily (PEP 562) so
+    # importing the module does not run the getters eagerly
+    if name == 'SYSTEM_PROMPT':
+        return get_system_prompt()
+    if name == 'EXTRACTOR_PROMPT':
+        return get_extractor_prompt()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -90,7 +90,14 @@ class MultiTurnReactAgent(FnCallAgent):
         
         # Get enabled tools for generating appropriate system prompt
         self.enabled_tools = get_enabled_tools()
-        
+        # Tools payload resolved lazily by get_tools_for_api; enabled_tools
+        # is fixed for the agent's lifetime so it is built exactly once
+        self._tools_for_api = None
+        # API clients keyed by (base_url, api_key): building one per
+        # call_server invocation would throw away their per-instance caches
+        # (serialized tools, rendered prompts) between turns
+        self._client_cache = {}
+
         print(f"Agent initialized with USE_REMOTE_API={self.use_remote_api}")
         if self.use_remote_api:
             print(f"Using remote API at: {self.inference_api_base}")
@@ -100,17 +107,20 @@ class MultiTurnReactAgent(FnCallAgent):
         return "<think>" in content and "</think>" in content
     
     def get_tools_for_api(self):
-        """Get tools in OpenAI API format"""
-        from prompt import TOOL_DEFINITIONS
-        tools = []
-        for tool_name in self.enabled_tools:
-            if tool_name in TOOL_DEFINITIONS:
-                try:
-                    tool_def = json.loads(TOOL_DEFINITIONS[tool_name])
-                    tools.append(tool_def)
-                except json.JSONDecodeError:
-                    print(f"Warning: Failed to parse tool definition for {tool_name}")
-        return tools if tools else None
+        """Get tools in OpenAI API format.
+
+        The list is built once and reused: besides skipping the rebuild on
+        every server call, handing the middleware the same list object each
+        turn lets its identity-keyed tools-schema cache hit.
+        """
+        if self._tools_for_api is None:
+            from prompt import TOOL_DEFINITIONS_PARSED
+            self._tools_for_api = [
+                TOOL_DEFINITIONS_PARSED[tool_name]
+                for tool_name in self.enabled_tools
+                if tool_name in TOOL_DEFINITIONS_PARSED
+            ]
+        return self._tools_for_api or None
     
     def call_server(self, msgs, planning_port, max_tries=10):
         """
@@ -134,19 +144,22 @@ class MultiTurnReactAgent(FnCallAgent):
             openai_api_key = "EMPTY"
             openai_api_base = f"http://127.0.0.1:{planning_port}/v1"
 
-        if self.use_remote_api and "generate" in openai_api_base:
-            client = OpenAI_LightLLM(
-                api_key=openai_api_key,
-                base_url=openai_api_base,
-                timeout=6000.0
-            )
-        else:
-            client = OpenAI_requests(
+        client = self._client_cache.get((openai_api_base, openai_api_key))
+        if client is None:
+            if self.use_remote_api and "generate" in openai_api_base:
+                client = OpenAI_LightLLM(
                     api_key=openai_api_key,
                     base_url=openai_api_base,
-                    timeout=6000.0,
-            )
-        
+                    timeout=6000.0
+                )
+            else:
+                client = OpenAI_requests(
+                        api_key=openai_api_key,
+                        base_url=openai_api_base,
+                        timeout=6000.0,
+                )
+            self._client_cache[(openai_api_base, openai_api_key)] = client
+
         tools = self.get_tools_for_api()
         base_sleep_time = 1 
         
@@ -338,15 +351,12 @@ class MultiTurnReactAgent(FnCallAgent):
                     # Extract metadata first to ensure they're always available
                     tool_call_id = tool_call.id
                     tool_name = tool_call.function.name
-                    tool_args_str = tool_call.function.arguments
-                    
+
                     try:
-                        # Parse arguments
-                        try:
-                            tool_args = json.loads(tool_args_str) if tool_args_str else {}
-                        except json.JSONDecodeError:
-                            tool_args = {}
-                        
+                        # Arguments come back already parsed from the
+                        # middleware; no json.loads round-trip needed
+                        tool_args = tool_call.function.arguments_obj
+
                         # Handle Python interpreter specially
                         if "python" in tool_name.lower():
                             try:
@@ -501,17 +511,9 @@ class MultiTurnReactAgent(FnCallAgent):
         Returns:
             Dictionary with tool names as keys and their definitions as values
         """
-        from prompt import TOOL_DEFINITIONS
-        tools_dict = {}
-        
-        for tool_name in used_tools:
-            if tool_name in TOOL_DEFINITIONS:
-                # Parse the JSON string to get the tool definition
-                try:
-                    tool_def = json.loads(TOOL_DEFINITIONS[tool_name])
-                    tools_dict[tool_name] = tool_def
-                except json.JSONDecodeError:
-                    # If parsing fails, store the raw string
-                    tools_dict[tool_name] = TOOL_DEFINITIONS[tool_name]
-        
-        return tools_dict
+        from prompt import TOOL_DEFINITIONS_PARSED
+        return {
+            tool_name: TOOL_DEFINITIONS_PARSED[tool_name]
+            for tool_name in used_tools
+            if tool_name in TOOL_DEFINITIONS_PARSED
+        }
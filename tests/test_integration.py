@@ -48,8 +48,9 @@ def test_openai_client_complete_flow():
         }]
     }
     
-    with patch('requests.post') as mock_post:
+    with patch.object(client.chat.completions._session, 'post') as mock_post:
         mock_resp = Mock()
+        mock_resp.content = json.dumps(mock_response_data).encode()
         mock_resp.json.return_value = mock_response_data
         mock_resp.raise_for_status = Mock()
         mock_post.return_value = mock_resp
@@ -102,7 +103,7 @@ def test_openai_client_complete_flow():
             b'data: [DONE]\n'
         ]
         
-        mock_resp.iter_lines.return_value = stream_data
+        mock_resp.iter_content.return_value = stream_data
         
         response = client.chat.completions.create(
             model="test-model",
@@ -140,8 +141,9 @@ def test_lightllm_client_complete_flow():
         ]
     }
     
-    with patch('requests.post') as mock_post:
+    with patch.object(client.chat.completions._session, 'post') as mock_post:
         mock_resp = Mock()
+        mock_resp.content = json.dumps(mock_response_data).encode()
         mock_resp.json.return_value = mock_response_data
         mock_resp.raise_for_status = Mock()
         mock_post.return_value = mock_resp
@@ -179,7 +181,7 @@ def test_lightllm_client_complete_flow():
             b'{"token": {"text": "response"}}\n',
         ]
         
-        mock_resp.iter_lines.return_value = stream_data
+        mock_resp.iter_content.return_value = stream_data
         
         response = client.chat.completions.create(
             model="test-model",
@@ -223,7 +225,7 @@ def test_error_handling():
         print("✓ Empty model handled correctly")
     
     # Test connection error
-    with patch('requests.post') as mock_post:
+    with patch.object(client.chat.completions._session, 'post') as mock_post:
         import requests
         mock_post.side_effect = requests.exceptions.ConnectionError("Connection failed")
         
@@ -237,7 +239,7 @@ def test_error_handling():
             print("✓ Connection error handled correctly")
     
     # Test timeout error
-    with patch('requests.post') as mock_post:
+    with patch.object(client.chat.completions._session, 'post') as mock_post:
         mock_post.side_effect = requests.exceptions.Timeout("Request timeout")
         
         try:
@@ -277,8 +279,9 @@ def test_backward_compatibility():
         }]
     }
     
-    with patch('requests.post') as mock_post:
+    with patch.object(client.chat.completions._session, 'post') as mock_post:
         mock_resp = Mock()
+        mock_resp.content = json.dumps(mock_response_data).encode()
         mock_resp.json.return_value = mock_response_data
         mock_resp.raise_for_status = Mock()
         mock_post.return_value = mock_resp
@@ -131,7 +131,7 @@ def test_aggregate_stream_response():
     ]
     
     mock_response = Mock()
-    mock_response.iter_lines.return_value = stream_data
+    mock_response.iter_content.return_value = stream_data
     
     result = client._aggregate_stream_response(mock_response)
     
@@ -178,6 +178,60 @@ Here is the content
     print("✓ Simple response handled correctly")
 
 
+def test_incremental_body_parsing():
+    """Test ijson-based incremental parsing of large response bodies"""
+    print("\n=== Testing incremental body parsing ===")
+
+    import io
+    from inference.openai_middleware import _STREAM_PARSE_MIN_BYTES
+
+    client = ChatCompletions(api_key="test", base_url="http://test.com")
+
+    # Routing decision is keyed off Content-Length
+    big_resp = Mock()
+    big_resp.headers = {"Content-Length": str(_STREAM_PARSE_MIN_BYTES)}
+    small_resp = Mock()
+    small_resp.headers = {"Content-Length": "10"}
+    assert client._should_stream_parse(big_resp), "Large bodies should use the incremental parser"
+    assert not client._should_stream_parse(small_resp), "Small bodies should use the whole-body parser"
+    print("✓ Content-Length routing works")
+
+    # Chat-completions body parsed straight off response.raw
+    body = json.dumps({
+        "choices": [{
+            "message": {
+                "role": "assistant",
+                "content": "Incremental content",
+                "reasoning_content": "Incremental reasoning"
+            },
+            "index": 0
+        }]
+    }).encode()
+    mock_resp = Mock()
+    mock_resp.raw = io.BytesIO(body)
+    completion = client._parse_chat_response_stream(mock_resp, "test-model")
+    assert completion.choices[0].message.content == "Incremental content"
+    assert completion.choices[0].message.reasoning_content == "Incremental reasoning"
+    print("✓ Chat response parsed incrementally")
+
+    # LightLLM generated_text pulled out without materializing the tree
+    with patch('inference.openai_middleware.Environment') as mock_env:
+        mock_template = Mock()
+        mock_template.render.return_value = "test query"
+        mock_env.return_value.get_template.return_value = mock_template
+
+        lightllm_client = lightllm_ChatCompletions(api_key="test", base_url="http://test.com")
+
+    for payload in ({"generated_text": ["stream text"]},
+                    {"generated_text": "stream text"},
+                    [{"generated_text": ["stream text"]}]):
+        mock_resp = Mock()
+        mock_resp.raw = io.BytesIO(json.dumps(payload).encode())
+        text = lightllm_client._extract_generated_text_stream(mock_resp)
+        assert text == "stream text", f"Should extract generated_text from {payload!r}"
+    print("✓ LightLLM generated_text extracted incrementally")
+
+
 def test_non_streaming_create():
     """Test non-streaming create method"""
     print("\n=== Testing non-streaming create ===")
@@ -204,12 +258,13 @@ def test_non_streaming_create():
         }]
     }
     
-    with patch('requests.post') as mock_post:
+    with patch.object(client._session, 'post') as mock_post:
         mock_resp = Mock()
+        mock_resp.content = json.dumps(mock_response_data).encode()
         mock_resp.json.return_value = mock_response_data
         mock_resp.raise_for_status = Mock()
         mock_post.return_value = mock_resp
-        
+
         completion = client.create(
             model="test-model",
             messages=[{"role": "user", "content": "test"}],
@@ -236,9 +291,9 @@ def test_streaming_create():
         b'data: [DONE]\n'
     ]
     
-    with patch('requests.post') as mock_post:
+    with patch.object(client._session, 'post') as mock_post:
         mock_resp = Mock()
-        mock_resp.iter_lines.return_value = stream_data
+        mock_resp.iter_content.return_value = stream_data
         mock_resp.raise_for_status = Mock()
         mock_post.return_value = mock_resp
         
@@ -252,6 +307,152 @@ def test_streaming_create():
         print("✓ Streaming create works correctly")
 
 
+def test_response_cache_hit():
+    """Test that deterministic repeats are served from the response cache"""
+    print("\n=== Testing response cache ===")
+
+    from inference.openai_middleware import InMemoryLRUCache
+
+    client = ChatCompletions(api_key="test", base_url="http://test.com",
+                             cache=InMemoryLRUCache())
+
+    mock_response_data = {
+        "choices": [{
+            "message": {"role": "assistant", "content": "Cached response"},
+            "index": 0
+        }]
+    }
+
+    with patch.object(client._session, 'post') as mock_post:
+        mock_resp = Mock()
+        mock_resp.content = json.dumps(mock_response_data).encode()
+        mock_resp.raise_for_status = Mock()
+        mock_post.return_value = mock_resp
+
+        messages = [{"role": "user", "content": "test"}]
+
+        first = client.create(model="test-model", messages=messages, temperature=0)
+        assert mock_post.call_count == 1
+        assert first.choices[0].message.content == "Cached response"
+
+        # Identical deterministic request: served from cache, no new POST
+        second = client.create(model="test-model", messages=messages, temperature=0)
+        assert mock_post.call_count == 1, "Repeat should not hit the server"
+        assert second.choices[0].message.content == "Cached response"
+        print("✓ Deterministic repeat served from cache")
+
+        # Non-zero temperature bypasses the cache entirely
+        client.create(model="test-model", messages=messages, temperature=0.7)
+        assert mock_post.call_count == 2, "Sampled request should hit the server"
+        print("✓ Sampled request bypasses the cache")
+
+
+def test_create_many():
+    """Test the concurrent fan-out helper"""
+    print("\n=== Testing create_many ===")
+
+    client = ChatCompletions(api_key="test", base_url="http://test.com")
+
+    mock_response_data = {
+        "choices": [{
+            "message": {"role": "assistant", "content": "Fan-out response"},
+            "index": 0
+        }]
+    }
+
+    with patch.object(client._session, 'post') as mock_post:
+        mock_resp = Mock()
+        mock_resp.content = json.dumps(mock_response_data).encode()
+        mock_resp.raise_for_status = Mock()
+        mock_post.return_value = mock_resp
+
+        calls = [
+            {"model": "test-model", "messages": [{"role": "user", "content": f"q{i}"}]}
+            for i in range(3)
+        ]
+        results = client.create_many(calls)
+
+        assert len(results) == 3, "Should return one completion per call"
+        assert all(r.choices[0].message.content == "Fan-out response" for r in results)
+        assert mock_post.call_count == 3, "Each call should POST once"
+        print("✓ create_many returns one completion per call")
+
+    assert client.create_many([]) == [], "Empty input should return empty list"
+    print("✓ Empty input handled correctly")
+
+
+def test_create_stream_generator():
+    """Test the delta-yielding streaming generator"""
+    print("\n=== Testing create_stream ===")
+
+    client = ChatCompletions(api_key="test", base_url="http://test.com")
+
+    stream_data = [
+        b'data: {"choices": [{"delta": {"content": "Hello"}}]}\n',
+        b'data: {"choices": [{"delta": {"content": " world"}}]}\n',
+        b'data: {"choices": [{"delta": {"reasoning_content": "thinking"}}]}\n',
+        b'data: [DONE]\n'
+    ]
+
+    with patch.object(client._session, 'post') as mock_post:
+        mock_resp = Mock()
+        mock_resp.iter_content.return_value = stream_data
+        mock_resp.raise_for_status = Mock()
+        mock_post.return_value = mock_resp
+
+        deltas = list(client.create_stream(
+            model="test-model",
+            messages=[{"role": "user", "content": "test"}]
+        ))
+
+    assert len(deltas) == 3, f"Should yield one delta per chunk, got {len(deltas)}"
+    assert deltas[0] == {"content": "Hello"}
+    assert deltas[1] == {"content": " world"}
+    assert deltas[2] == {"reasoning_content": "thinking"}
+    print("✓ create_stream yields each delta as it arrives")
+
+
+def test_render_fast_matches_template():
+    """Test that the specialized renderer matches the Jinja template"""
+    print("\n=== Testing fast-path render equivalence ===")
+
+    # Real template (no Environment mock): the whole point is byte identity.
+    # Earlier tests construct clients under a mocked Environment, which the
+    # memoized template helpers capture, so reset them first.
+    from inference.openai_middleware import _lightllm_template_env, _lightllm_chat_template
+    _lightllm_template_env.cache_clear()
+    _lightllm_chat_template.cache_clear()
+
+    client = lightllm_ChatCompletions(api_key="test", base_url="http://test.com/generate")
+
+    messages = [
+        {"role": "system", "content": "You are helpful."},
+        {"role": "user", "content": "Hi there"},
+        {"role": "assistant", "content": "Hello!"},
+        {"role": "user", "content": "What is 2+2?"},
+    ]
+
+    fast = client._render_fast(messages)
+    assert fast is not None, "Plain-string conversation should take the fast path"
+
+    reference = client.template.render(
+        messages=messages,
+        tools=[],
+        enable_thinking=False,
+        today_date=client.today_date()
+    )
+    assert fast == reference, "Fast path must be byte-identical to the template"
+    print("✓ Fast path output is byte-identical to the template")
+
+    # Messages outside the supported subset fall back to the template
+    assert client._render_fast([{"role": "tool", "content": "result"}]) is None
+    assert client._render_fast([{"role": "user", "content": [{"type": "text"}]}]) is None
+    assert client._render_fast(
+        [{"role": "assistant", "content": "x", "tool_calls": [{"id": "1"}]}]
+    ) is None
+    print("✓ Unsupported message shapes fall back to the template")
+
+
 def test_field_separation():
     """Test that fields are properly separated"""
     print("\n=== Testing field separation ===")
@@ -281,8 +482,13 @@ def run_all_tests():
         test_create_completion_helper()
         test_aggregate_stream_response()
         test_lightllm_parse_response()
+        test_incremental_body_parsing()
         test_non_streaming_create()
         test_streaming_create()
+        test_response_cache_hit()
+        test_create_many()
+        test_create_stream_generator()
+        test_render_fast_matches_template()
         test_field_separation()
         
         print("\n" + "="*60)